@@ -1,4 +1,8 @@
+import time
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -6,6 +10,7 @@ from jose import JWTError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.core.database import get_session
 from app.core.errors import AppError
 from app.core.security import decode_token
@@ -14,10 +19,54 @@ from app.models.user import User
 security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    id: uuid.UUID
+    email: str
+
+
+class _UserCache:
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[uuid.UUID, tuple[float, CurrentUser]] = OrderedDict()
+
+    def get(self, user_id: uuid.UUID) -> CurrentUser | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def set(self, user: CurrentUser) -> None:
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+
+@lru_cache
+def _get_user_cache() -> _UserCache:
+    settings = get_settings()
+    return _UserCache(settings.user_cache_max_size, settings.user_cache_ttl_seconds)
+
+
+def invalidate_cached_user(user_id: uuid.UUID) -> None:
+    # Call after deleting a user or revoking their access; the cache is per process, so other
+    # workers still serve the old entry for up to user_cache_ttl_seconds.
+    _get_user_cache().pop(user_id)
+
+
+async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-) -> User:
+) -> uuid.UUID:
     if credentials is None:
         raise AppError("auth_required", "Authentication required", status_code=401)
 
@@ -30,13 +79,25 @@ async def get_current_user(
         raise AppError("invalid_token", "Invalid access token", status_code=401)
 
     try:
-        user_id = uuid.UUID(payload.get("sub", ""))
+        return uuid.UUID(payload.get("sub", ""))
     except ValueError as exc:
         raise AppError("invalid_token", "Invalid access token", status_code=401) from exc
 
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> CurrentUser:
+    cache = _get_user_cache()
+    cached = cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    result = await session.execute(select(User.id, User.email).where(User.id == user_id))
+    row = result.one_or_none()
+    if row is None:
         raise AppError("user_not_found", "User not found", status_code=401)
 
+    user = CurrentUser(id=row.id, email=row.email)
+    cache.set(user)
     return user
@@ -9,8 +9,8 @@ from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
 )
 from app.models.user import User
 from app.schemas.auth import LoginRequest, RefreshRequest, RegisterRequest, TokenResponse
@@ -25,7 +25,7 @@ async def register(payload: RegisterRequest, session: AsyncSession = Depends(get
     if existing:
         raise AppError("email_taken", "Email already registered", status_code=409)
 
-    user = User(email=payload.email, password_hash=hash_password(payload.password))
+    user = User(email=payload.email, password_hash=await hash_password_async(payload.password))
     session.add(user)
     await session.commit()
 
@@ -38,7 +38,7 @@ async def register(payload: RegisterRequest, session: AsyncSession = Depends(get
 async def login(payload: LoginRequest, session: AsyncSession = Depends(get_session)) -> TokenResponse:
     result = await session.execute(select(User).where(User.email == payload.email))
     user = result.scalar_one_or_none()
-    if user is None or not verify_password(payload.password, user.password_hash):
+    if user is None or not await verify_password_async(payload.password, user.password_hash):
         raise AppError("invalid_credentials", "Invalid email or password", status_code=401)
 
     access = create_access_token(str(user.id))
@@ -1,28 +1,169 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+import orjson
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from fastapi.responses import Response
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.core.database import get_session
+from app.core.errors import AppError
 from app.models.video import Video
-from app.schemas.video import FeedResponse, VideoOut
+from app.schemas.video import FeedResponse
+from app.services.cache import (
+    acquire_feed_fill_lock,
+    feed_page_key,
+    get_cached_feed_page,
+    get_feed_version,
+    log_redis_unavailable,
+    release_feed_fill_lock,
+    set_cached_feed_page,
+    wait_for_feed_page,
+)
+from app.services.storage import generate_presigned_get_url
 
 router = APIRouter(tags=["feed"])
 
+# Columns matching FeedItemOut; rows are serialized as-is without building ORM objects.
+FEED_COLUMNS = (
+    Video.id,
+    Video.user_id,
+    Video.title,
+    Video.processed_object_key,
+    Video.renditions,
+    Video.cover_object_key,
+    Video.duration_sec,
+    Video.created_at,
+)
+
+
+def _encode_cursor(created_at: datetime, video_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{video_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, video_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(video_id)
+    except ValueError as exc:
+        raise AppError("invalid_cursor", "Invalid feed cursor", status_code=400) from exc
+
+
+async def _estimate_total(session: AsyncSession) -> int:
+    # The partial index only holds ready rows, so its row estimate is the feed size.
+    result = await session.execute(
+        text(
+            "SELECT reltuples::bigint FROM pg_class "
+            "WHERE oid = 'ix_videos_ready_created_at_id'::regclass"
+        )
+    )
+    estimate = result.scalar_one()
+    if estimate < 0:
+        # The index has never been vacuumed/analyzed, so no estimate exists yet.
+        count_result = await session.execute(
+            select(func.count()).select_from(Video).where(Video.status == "ready")
+        )
+        return count_result.scalar_one()
+    return estimate
+
+
+async def _build_feed_page(
+    session: AsyncSession,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    include_total: bool,
+) -> bytes:
+    total = await _estimate_total(session) if include_total else None
+
+    query = (
+        select(*FEED_COLUMNS)
+        .where(Video.status == "ready")
+        .order_by(Video.created_at.desc(), Video.id.desc())
+    )
+    if cursor is not None:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Video.created_at, Video.id) < (cursor_created_at, cursor_id))
+    else:
+        query = query.offset(offset)
+
+    result = await session.execute(query.limit(limit + 1))
+    items = [dict(row) for row in result.mappings()]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1]["created_at"], items[-1]["id"])
+
+    for item in items:
+        processed_key, cover_key = item["processed_object_key"], item["cover_object_key"]
+        item["playback_url"] = generate_presigned_get_url(processed_key) if processed_key else None
+        item["cover_url"] = generate_presigned_get_url(cover_key) if cover_key else None
+
+    return orjson.dumps(
+        {
+            "items": items,
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+async def _cached_feed_page(
+    session: AsyncSession,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    include_total: bool,
+) -> bytes:
+    payload = None
+    try:
+        key = feed_page_key(await get_feed_version(), limit, offset, cursor, include_total)
+        payload = await get_cached_feed_page(key)
+        if payload is None:
+            # Only one request per key refills the page; the rest wait for it briefly.
+            lock_token = await acquire_feed_fill_lock(key)
+            if lock_token is not None:
+                try:
+                    payload = await _build_feed_page(session, limit, offset, cursor, include_total)
+                    await set_cached_feed_page(key, payload)
+                finally:
+                    await release_feed_fill_lock(key, lock_token)
+            else:
+                payload = await wait_for_feed_page(key)
+    except RedisError as exc:
+        log_redis_unavailable("feed_cache_unavailable", exc)
+
+    if payload is None:
+        payload = await _build_feed_page(session, limit, offset, cursor, include_total)
+    return payload
+
 
 @router.get("/feed", response_model=FeedResponse)
 async def feed(
     limit: int = 20,
     offset: int = 0,
+    cursor: str | None = None,
+    include_total: bool = False,
     session: AsyncSession = Depends(get_session),
-) -> FeedResponse:
+) -> Response:
+    settings = get_settings()
     limit = min(max(limit, 1), 50)
-    offset = max(offset, 0)
+    offset = 0 if cursor is not None else max(offset, 0)
 
-    total_result = await session.execute(select(func.count()).select_from(Video))
-    total = total_result.scalar_one()
-
-    result = await session.execute(
-        select(Video).order_by(Video.created_at.desc()).offset(offset).limit(limit)
+    cacheable = settings.feed_cache_enabled and (
+        cursor is not None or offset < limit * settings.feed_cache_max_pages
     )
-    items = [VideoOut.model_validate(video) for video in result.scalars().all()]
-    return FeedResponse(items=items, limit=limit, offset=offset, total=total)
+    if cacheable:
+        payload = await _cached_feed_page(session, limit, offset, cursor, include_total)
+    else:
+        payload = await _build_feed_page(session, limit, offset, cursor, include_total)
+    return Response(content=payload, media_type="application/json")
@@ -0,0 +1,74 @@
+import hmac
+import logging
+from typing import Any
+from urllib.parse import unquote_plus
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_session
+from app.core.errors import AppError
+from app.services.cache import clear_transcode_progress
+from app.services.transcode_jobs import enqueue_transcodes
+from app.services.videos import MULTIPART_UPLOAD_CLEARED, transition_videos_status
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+
+def _uploaded_raw_objects(event: dict[str, Any], bucket: str) -> dict[UUID, int | None]:
+    uploads: dict[UUID, int | None] = {}
+    for record in event.get("Records") or []:
+        if not str(record.get("eventName", "")).startswith("s3:ObjectCreated"):
+            continue
+        s3 = record.get("s3", {})
+        if s3.get("bucket", {}).get("name") != bucket:
+            continue
+        obj = s3.get("object", {})
+        # Object keys arrive URL-encoded in S3 event records.
+        parts = unquote_plus(str(obj.get("key", ""))).split("/")
+        if len(parts) != 3 or parts[0] != "raw":
+            continue
+        try:
+            video_id = UUID(parts[1])
+        except ValueError:
+            continue
+        uploads[video_id] = obj.get("size")
+    return uploads
+
+
+@router.post("/events")
+async def storage_events(
+    event: dict[str, Any],
+    authorization: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+) -> dict[str, int]:
+    settings = get_settings()
+    token = settings.storage_events_token
+    if not token:
+        raise AppError("not_found", "Not found", status_code=404)
+    if authorization is None or not hmac.compare_digest(authorization, f"Bearer {token}"):
+        raise AppError("invalid_token", "Invalid storage event token", status_code=401)
+
+    uploads = _uploaded_raw_objects(event, settings.minio_bucket)
+    if not uploads:
+        return {"accepted": 0}
+
+    updated = await transition_videos_status(
+        session,
+        list(uploads),
+        "processing",
+        from_statuses=("pending", "failed"),
+        # The object is complete, so a multipart upload the event raced past is finished too.
+        values={"error_message": None, **MULTIPART_UPLOAD_CLEARED},
+    )
+    await session.commit()
+
+    await clear_transcode_progress([str(video.id) for video in updated])
+    enqueue_transcodes({video.id: uploads[video.id] for video in updated})
+    for video in updated:
+        logger.info("video_status_change video_id=%s status=processing source=event", video.id)
+    return {"accepted": len(updated)}
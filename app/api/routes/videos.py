@@ -1,25 +1,55 @@
+import asyncio
+import math
 import os
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import CurrentUser, get_current_user, get_current_user_id
 from app.core.database import get_session
 from app.core.config import get_settings
 from app.core.errors import AppError
-from app.models.user import User
 from app.models.video import Video
 from app.schemas.video import (
+    VideoBatchOut,
+    VideoMultipartUploadInitResponse,
+    VideoMultipartUploadStatusResponse,
     VideoOut,
+    VideoUploadCompleteBatchRequest,
     VideoUploadCompleteRequest,
+    VideoUploadedPart,
     VideoUploadInitRequest,
     VideoUploadInitResponse,
+    VideoUploadPart,
+)
+from app.services.cache import (
+    clear_transcode_progress,
+    get_transcode_progress,
+    log_redis_unavailable,
+)
+from app.services.storage import (
+    StorageError,
+    abort_multipart_upload_async,
+    complete_multipart_upload_async,
+    create_multipart_upload_async,
+    generate_presigned_get_url,
+    generate_presigned_part_url,
+    generate_presigned_put_url,
+    list_uploaded_parts_async,
+    object_size_async,
+)
+from app.services.transcode_jobs import enqueue_transcodes
+from app.services.videos import (
+    MULTIPART_UPLOAD_CLEARED,
+    transition_video_status,
+    transition_videos_status,
 )
-from app.services.storage import generate_presigned_put_url, object_exists
-from app.tasks.worker import celery_app
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
@@ -28,12 +58,18 @@ def _safe_filename(filename: str) -> str:
     return os.path.basename(filename)
 
 
-@router.post("/upload/init", response_model=VideoUploadInitResponse)
-async def init_upload(
-    payload: VideoUploadInitRequest,
-    session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
-) -> VideoUploadInitResponse:
+def _video_out(video: Video) -> VideoOut:
+    out = VideoOut.model_validate(video)
+    if video.processed_object_key:
+        out.playback_url = generate_presigned_get_url(video.processed_object_key)
+    if video.cover_object_key:
+        out.cover_url = generate_presigned_get_url(video.cover_object_key)
+    return out
+
+
+async def _create_pending_video(
+    session: AsyncSession, user_id: UUID, payload: VideoUploadInitRequest
+) -> Video:
     settings = get_settings()
     if payload.content_type not in settings.allowed_content_types:
         raise AppError("invalid_content_type", "Unsupported content type", status_code=400)
@@ -43,7 +79,7 @@ async def init_upload(
     safe_name = _safe_filename(payload.filename)
     suffix = Path(safe_name).suffix or ".bin"
     video = Video(
-        user_id=current_user.id,
+        user_id=user_id,
         status="pending",
         title=payload.title,
         raw_object_key="",
@@ -51,41 +87,356 @@ async def init_upload(
     session.add(video)
     await session.flush()
 
-    object_key = f"raw/{video.id}/{video.id}{suffix}"
-    video.raw_object_key = object_key
+    video.raw_object_key = f"raw/{video.id}/{video.id}{suffix}"
+    return video
+
+
+async def _get_owned_video(session: AsyncSession, video_id: UUID, user_id: UUID) -> Video:
+    result = await session.execute(select(Video).where(Video.id == video_id))
+    video = result.scalar_one_or_none()
+    if video is None:
+        raise AppError("video_not_found", "Video not found", status_code=404)
+    if video.user_id != user_id:
+        raise AppError("forbidden", "No access to this video", status_code=403)
+    return video
+
+
+async def _start_processing(
+    session: AsyncSession,
+    video: Video,
+    user_id: UUID,
+    size_bytes: int,
+    values: dict[str, Any] | None = None,
+) -> VideoOut:
+    updated = await transition_video_status(
+        session,
+        video.id,
+        "processing",
+        from_statuses=("pending", "failed"),
+        user_id=user_id,
+        values={"error_message": None, **(values or {})},
+    )
+    await session.commit()
+    if updated is None:
+        # A concurrent request moved the video first; report its current state.
+        await session.refresh(video)
+        return _video_out(video)
+
+    await clear_transcode_progress([str(updated.id)])
+    enqueue_transcodes({updated.id: size_bytes})
+    return _video_out(updated)
+
+
+@dataclass(frozen=True, slots=True)
+class _MultipartUpload:
+    upload_id: str
+    part_size: int
+    part_count: int
+    size_bytes: int
+
+
+def _multipart_part_urls(
+    video: Video, upload_id: str, part_numbers: list[int]
+) -> list[VideoUploadPart]:
+    settings = get_settings()
+    return [
+        VideoUploadPart(
+            part_number=part_number,
+            upload_url=generate_presigned_part_url(
+                video.raw_object_key,
+                upload_id,
+                part_number,
+                settings.multipart_url_expire_seconds,
+            ),
+        )
+        for part_number in part_numbers
+    ]
+
+
+def _require_multipart_upload(video: Video) -> _MultipartUpload:
+    # Same precondition as abort: abort, expiry and completion all clear these columns, so only
+    # a pending video can still have an upload in progress.
+    if (
+        video.status != "pending"
+        or video.multipart_upload_id is None
+        or video.multipart_part_size is None
+        or video.multipart_part_count is None
+    ):
+        raise AppError("no_multipart_upload", "No multipart upload in progress", status_code=400)
+    size_bytes = video.multipart_size_bytes
+    if size_bytes is None:
+        # Uploads started before the declared size was stored are bounded by their part plan.
+        size_bytes = video.multipart_part_size * video.multipart_part_count
+    return _MultipartUpload(
+        upload_id=video.multipart_upload_id,
+        part_size=video.multipart_part_size,
+        part_count=video.multipart_part_count,
+        size_bytes=size_bytes,
+    )
+
+
+def _multipart_storage_error(exc: StorageError) -> AppError:
+    code = exc.code
+    if code == "NoSuchUpload":
+        return AppError(
+            "multipart_upload_gone",
+            "Multipart upload was aborted or has expired",
+            status_code=409,
+        )
+    if code in {"InvalidPart", "InvalidPartOrder", "EntityTooSmall"}:
+        return AppError(
+            "invalid_upload_parts",
+            "Uploaded parts were rejected by storage",
+            status_code=400,
+            details={"storage_code": code},
+        )
+    return AppError(
+        "storage_error",
+        "Object storage request failed",
+        status_code=502,
+        details={"storage_code": code},
+    )
+
+
+@router.post("/upload/init", response_model=VideoUploadInitResponse)
+async def init_upload(
+    payload: VideoUploadInitRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> VideoUploadInitResponse:
+    video = await _create_pending_video(session, current_user.id, payload)
+    await session.commit()
+
+    upload_url = generate_presigned_put_url(video.raw_object_key, payload.content_type)
+    return VideoUploadInitResponse(
+        upload_url=upload_url, object_key=video.raw_object_key, video_id=video.id
+    )
+
+
+@router.post("/upload/multipart/init", response_model=VideoMultipartUploadInitResponse)
+async def init_multipart_upload(
+    payload: VideoUploadInitRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> VideoMultipartUploadInitResponse:
+    settings = get_settings()
+    video = await _create_pending_video(session, current_user.id, payload)
+
+    # S3 allows at most 10000 parts, and every part but the last must be >= 5 MiB.
+    part_size = max(
+        settings.multipart_part_size_bytes,
+        5 * 1024 * 1024,
+        math.ceil(payload.size_bytes / 10000),
+    )
+    part_count = max(math.ceil(payload.size_bytes / part_size), 1)
+    try:
+        upload_id = await create_multipart_upload_async(video.raw_object_key, payload.content_type)
+    except StorageError as exc:
+        raise _multipart_storage_error(exc) from exc
+    video.multipart_part_size = part_size
+    video.multipart_part_count = part_count
+    video.multipart_size_bytes = payload.size_bytes
+    video.multipart_upload_id = upload_id
     await session.commit()
-    await session.refresh(video)
 
-    upload_url = generate_presigned_put_url(object_key, payload.content_type)
-    return VideoUploadInitResponse(upload_url=upload_url, object_key=object_key, video_id=video.id)
+    return VideoMultipartUploadInitResponse(
+        video_id=video.id,
+        object_key=video.raw_object_key,
+        upload_id=upload_id,
+        part_size=part_size,
+        parts=_multipart_part_urls(video, upload_id, list(range(1, part_count + 1))),
+    )
+
+
+@router.get("/{video_id}/upload/multipart", response_model=VideoMultipartUploadStatusResponse)
+async def get_multipart_upload(
+    video_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VideoMultipartUploadStatusResponse:
+    video = await _get_owned_video(session, video_id, current_user_id)
+    upload = _require_multipart_upload(video)
+
+    try:
+        parts = await list_uploaded_parts_async(video.raw_object_key, upload.upload_id)
+    except StorageError as exc:
+        raise _multipart_storage_error(exc) from exc
+    uploaded = {part["PartNumber"] for part in parts}
+    pending = [n for n in range(1, upload.part_count + 1) if n not in uploaded]
+    return VideoMultipartUploadStatusResponse(
+        video_id=video.id,
+        upload_id=upload.upload_id,
+        part_size=upload.part_size,
+        uploaded_parts=[
+            VideoUploadedPart(part_number=part["PartNumber"], etag=part["ETag"], size=part["Size"])
+            for part in parts
+        ],
+        pending_parts=_multipart_part_urls(video, upload.upload_id, pending),
+    )
+
+
+@router.post("/upload/multipart/complete", response_model=VideoOut)
+async def complete_multipart_upload(
+    payload: VideoUploadCompleteRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VideoOut:
+    video = await _get_owned_video(session, payload.video_id, current_user_id)
+    if video.status in {"processing", "ready"}:
+        return _video_out(video)
+    upload = _require_multipart_upload(video)
+
+    try:
+        listed = await list_uploaded_parts_async(video.raw_object_key, upload.upload_id)
+    except StorageError as exc:
+        raise _multipart_storage_error(exc) from exc
+    # Parts beyond the planned count are never presigned by us; leave them out of the object.
+    parts = [part for part in listed if part["PartNumber"] <= upload.part_count]
+    uploaded = {part["PartNumber"] for part in parts}
+    missing = [n for n in range(1, upload.part_count + 1) if n not in uploaded]
+    if missing:
+        raise AppError(
+            "upload_incomplete",
+            "Not all parts have been uploaded",
+            status_code=400,
+            details={"missing_parts": missing},
+        )
+
+    # Presigned part URLs do not bound the body size, so enforce the declared size here.
+    size_bytes = sum(part["Size"] for part in parts)
+    if size_bytes > min(upload.size_bytes, get_settings().max_upload_size_bytes):
+        raise AppError(
+            "file_too_large",
+            "Uploaded parts exceed the declared size",
+            status_code=400,
+            details={"declared_size": upload.size_bytes, "uploaded_size": size_bytes},
+        )
+
+    try:
+        await complete_multipart_upload_async(video.raw_object_key, upload.upload_id, parts)
+    except StorageError as exc:
+        raise _multipart_storage_error(exc) from exc
+    return await _start_processing(
+        session, video, current_user_id, size_bytes, MULTIPART_UPLOAD_CLEARED
+    )
+
+
+@router.post("/upload/multipart/abort", response_model=VideoOut)
+async def abort_multipart_upload(
+    payload: VideoUploadCompleteRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VideoOut:
+    video = await _get_owned_video(session, payload.video_id, current_user_id)
+    upload = _require_multipart_upload(video)
+
+    try:
+        await abort_multipart_upload_async(video.raw_object_key, upload.upload_id)
+    except StorageError as exc:
+        # Already aborted or expired on the storage side; anything else leaves the upload live.
+        if exc.code != "NoSuchUpload":
+            raise _multipart_storage_error(exc) from exc
+
+    updated = await transition_video_status(
+        session,
+        video.id,
+        "failed",
+        from_statuses=("pending",),
+        user_id=current_user_id,
+        values={"error_message": "upload_aborted", **MULTIPART_UPLOAD_CLEARED},
+    )
+    await session.commit()
+    if updated is None:
+        await session.refresh(video)
+        return _video_out(video)
+    return _video_out(updated)
 
 
 @router.post("/upload/complete", response_model=VideoOut)
 async def complete_upload(
     payload: VideoUploadCompleteRequest,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user_id: UUID = Depends(get_current_user_id),
 ) -> VideoOut:
-    result = await session.execute(select(Video).where(Video.id == payload.video_id))
-    video = result.scalar_one_or_none()
-    if video is None:
-        raise AppError("video_not_found", "Video not found", status_code=404)
-    if video.user_id != current_user.id:
-        raise AppError("forbidden", "No access to this video", status_code=403)
-
+    video = await _get_owned_video(session, payload.video_id, current_user_id)
     if video.status in {"processing", "ready"}:
-        return VideoOut.model_validate(video)
+        return _video_out(video)
 
-    if not object_exists(video.raw_object_key):
+    size_bytes = await object_size_async(video.raw_object_key)
+    if size_bytes is None:
         raise AppError("upload_missing", "Uploaded object not found", status_code=400)
 
-    video.status = "processing"
-    video.error_message = None
+    return await _start_processing(session, video, current_user_id, size_bytes)
+
+
+@router.post("/upload/complete/batch", response_model=VideoBatchOut)
+async def complete_upload_batch(
+    payload: VideoUploadCompleteBatchRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VideoBatchOut:
+    settings = get_settings()
+    video_ids = list(dict.fromkeys(payload.video_ids))
+    if len(video_ids) > settings.upload_complete_batch_max:
+        raise AppError(
+            "batch_too_large",
+            "Too many videos in one batch",
+            status_code=400,
+            details={"max": settings.upload_complete_batch_max},
+        )
+
+    result = await session.execute(select(Video).where(Video.id.in_(video_ids)))
+    videos = {video.id: video for video in result.scalars().all()}
+    missing = [str(video_id) for video_id in video_ids if video_id not in videos]
+    if missing:
+        raise AppError(
+            "video_not_found", "Video not found", status_code=404, details={"video_ids": missing}
+        )
+    forbidden = [str(video.id) for video in videos.values() if video.user_id != current_user_id]
+    if forbidden:
+        raise AppError(
+            "forbidden",
+            "No access to this video",
+            status_code=403,
+            details={"video_ids": forbidden},
+        )
+
+    to_process = [
+        videos[video_id]
+        for video_id in video_ids
+        if videos[video_id].status not in {"processing", "ready"}
+    ]
+    sizes = await asyncio.gather(
+        *(object_size_async(video.raw_object_key) for video in to_process)
+    )
+    size_by_id = {video.id: size for video, size in zip(to_process, sizes, strict=True)}
+    not_uploaded = [str(video_id) for video_id, size in size_by_id.items() if size is None]
+    if not_uploaded:
+        raise AppError(
+            "upload_missing",
+            "Uploaded object not found",
+            status_code=400,
+            details={"video_ids": not_uploaded},
+        )
+
+    updated = []
+    if to_process:
+        updated = await transition_videos_status(
+            session,
+            [video.id for video in to_process],
+            "processing",
+            from_statuses=("pending", "failed"),
+            user_id=current_user_id,
+            values={"error_message": None},
+        )
     await session.commit()
-    await session.refresh(video)
 
-    celery_app.send_task("transcode_video", args=[str(video.id)])
-    return VideoOut.model_validate(video)
+    if updated:
+        await clear_transcode_progress([str(video.id) for video in updated])
+        enqueue_transcodes({video.id: size_by_id[video.id] for video in updated})
+
+    # The bulk UPDATE refreshed the updated rows in the session, so `videos` is current.
+    return VideoBatchOut(items=[_video_out(videos[video_id]) for video_id in video_ids])
 
 
 @router.get("/{video_id}", response_model=VideoOut)
@@ -94,4 +445,10 @@ async def get_video(video_id: UUID, session: AsyncSession = Depends(get_session)
     video = result.scalar_one_or_none()
     if video is None:
         raise AppError("video_not_found", "Video not found", status_code=404)
-    return VideoOut.model_validate(video)
+    out = _video_out(video)
+    if video.status == "processing":
+        try:
+            out.progress_percent = await get_transcode_progress(str(video.id))
+        except RedisError as exc:
+            log_redis_unavailable("transcode_progress_unavailable", exc)
+    return out
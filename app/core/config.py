@@ -7,9 +7,16 @@ class Settings(BaseSettings):
 
     app_name: str = "neo-reels-backend"
     log_level: str = "info"
+    # Adds Server-Timing headers and per-request SQL/storage timing logs.
+    request_profiling_enabled: bool = False
+    slow_request_threshold_ms: int = 500
 
     database_url: str
     redis_url: str
+    # Redis only backs caches and progress; fail fast so callers fall back instead of stalling.
+    redis_connect_timeout_seconds: float = 0.5
+    redis_socket_timeout_seconds: float = 0.5
+    redis_unavailable_log_interval_seconds: int = 60
 
     minio_endpoint: str
     minio_public_endpoint: str | None = None
@@ -17,11 +24,21 @@ class Settings(BaseSettings):
     minio_secret_key: str
     minio_bucket: str = "videos"
     minio_region: str = "us-east-1"
+    # Shared secret for MinIO webhook notifications; the endpoint is disabled when unset.
+    storage_events_token: str | None = None
+    s3_max_pool_connections: int = 50
+    s3_connect_timeout_seconds: float = 5.0
+    s3_read_timeout_seconds: float = 30.0
+    s3_max_attempts: int = 3
 
     jwt_secret_key: str
     jwt_refresh_secret_key: str
     access_token_expire_minutes: int = 30
     refresh_token_expire_minutes: int = 43200
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 16
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_size: int = 10000
 
     allowed_content_types: list[str] = [
         "video/mp4",
@@ -30,6 +47,36 @@ class Settings(BaseSettings):
         "video/webm",
     ]
     max_upload_size_bytes: int = 1024 * 1024 * 500
+    upload_complete_batch_max: int = 50
+    multipart_part_size_bytes: int = 1024 * 1024 * 16
+    multipart_url_expire_seconds: int = 6 * 3600
+    multipart_upload_expire_hours: int = 24
+    presigned_get_expire_seconds: int = 3600
+
+    # Rendition height -> max video bitrate (kbps); rungs above the source height are skipped.
+    transcode_ladder: dict[int, int] = {240: 400, 480: 1200, 720: 2800, 1080: 5000}
+    hls_segment_seconds: int = 4
+    # libx264 encoding profile; scripts/benchmark_transcode.py measures the tradeoffs.
+    transcode_preset: str = "fast"
+    transcode_crf: int = 23
+    # 0 lets ffmpeg pick a thread count from the available cores.
+    transcode_threads: int = 0
+    transcode_audio_bitrate_kbps: int = 128
+    transcode_streaming_input: bool = True
+    transcode_upload_concurrency: int = 4
+    transcode_short_max_bytes: int = 1024 * 1024 * 50
+    transcode_max_retries: int = 2
+    transcode_retry_delay_seconds: int = 60
+    # Renewed while ffmpeg runs; a duplicate delivery waits until the holder's lease lapses.
+    transcode_lease_seconds: int = 300
+    transcode_progress_ttl_seconds: int = 3600
+    worker_metrics_port: int | None = None
+    # Must exceed the longest transcode, otherwise Redis redelivers unacked (acks_late) tasks.
+    celery_visibility_timeout_seconds: int = 6 * 3600
+
+    feed_cache_enabled: bool = True
+    feed_cache_ttl_seconds: int = 30
+    feed_cache_max_pages: int = 5
 
 
 @lru_cache
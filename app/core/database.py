@@ -1,13 +1,39 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from app.core.config import get_settings
+from app.core.profiling import instrument_engine
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(settings.database_url, echo=False, pool_pre_ping=True)
+    if settings.request_profiling_enabled:
+        instrument_engine(engine.sync_engine)
+    return engine
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
+
+
+def engine_created() -> bool:
+    return get_engine.cache_info().currsize > 0
 
-settings = get_settings()
 
-engine = create_async_engine(settings.database_url, echo=False, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+async def dispose_engine() -> None:
+    if engine_created():
+        await get_engine().dispose()
 
 
 async def get_session() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         yield session
@@ -0,0 +1,126 @@
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bounds memory for requests that issue runaway numbers of statements (the N+1 case).
+MAX_CAPTURED_STATEMENTS = 200
+
+
+@dataclass
+class RequestProfile:
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    statements: list[tuple[float, str]] = field(default_factory=list)
+    storage_count: int = 0
+    storage_seconds: float = 0.0
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current_profile.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    profile.sql_count += 1
+    profile.sql_seconds += elapsed
+    if len(profile.statements) < MAX_CAPTURED_STATEMENTS:
+        profile.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Listeners are no-ops outside a profiled request, so the worker can share the engine.
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_storage_call(context: dict, **_) -> None:
+    if _current_profile.get() is not None:
+        context["profile_start"] = time.perf_counter()
+
+
+def _after_storage_call(context: dict, **_) -> None:
+    profile = _current_profile.get()
+    start = context.pop("profile_start", None)
+    if profile is None or start is None:
+        return
+    profile.storage_count += 1
+    profile.storage_seconds += time.perf_counter() - start
+
+
+def instrument_s3_client(client) -> None:
+    # botocore passes the same per-request context dict to both events, so concurrent calls
+    # on a shared client never mix up their start times.
+    client.meta.events.register("before-call.s3.*", _before_storage_call)
+    client.meta.events.register("after-call.s3.*", _after_storage_call)
+
+
+def _server_timing(total_ms: float, profile: RequestProfile) -> str:
+    db_ms = profile.sql_seconds * 1000
+    storage_ms = profile.storage_seconds * 1000
+    return ", ".join(
+        [
+            f"app;dur={total_ms:.1f}",
+            f'db;dur={db_ms:.1f};desc="{profile.sql_count} queries"',
+            f'storage;dur={storage_ms:.1f};desc="{profile.storage_count} calls"',
+        ]
+    )
+
+
+async def profiling_middleware(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    settings = get_settings()
+    profile = RequestProfile()
+    token = _current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current_profile.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    response.headers["Server-Timing"] = _server_timing(total_ms, profile)
+    slow = total_ms >= settings.slow_request_threshold_ms
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        "request method=%s path=%s status=%s total_ms=%.1f sql_count=%d sql_ms=%.1f "
+        "storage_count=%d storage_ms=%.1f slow=%s",
+        request.method,
+        request.url.path,
+        response.status_code,
+        total_ms,
+        profile.sql_count,
+        profile.sql_seconds * 1000,
+        profile.storage_count,
+        profile.storage_seconds * 1000,
+        slow,
+    )
+    if slow:
+        for index, (elapsed, statement) in enumerate(profile.statements):
+            logger.warning(
+                "slow_request_sql method=%s path=%s index=%d ms=%.1f sql=%s",
+                request.method,
+                request.url.path,
+                index,
+                elapsed * 1000,
+                " ".join(statement.split()),
+            )
+    return response
@@ -1,15 +1,22 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, TypeVar
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
-
-settings = get_settings()
+from app.core.errors import AppError
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+_password_jobs_in_flight = 0
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -19,6 +26,36 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@lru_cache
+def _get_password_executor() -> ThreadPoolExecutor:
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.password_hash_workers, thread_name_prefix="password"
+    )
+
+
+async def _run_password_job(func: Callable[..., T], *args: Any) -> T:
+    global _password_jobs_in_flight
+    settings = get_settings()
+    limit = settings.password_hash_workers + settings.password_hash_queue_size
+    if _password_jobs_in_flight >= limit:
+        raise AppError("too_many_requests", "Too many requests, retry later", status_code=429)
+    _password_jobs_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_executor(), func, *args)
+    finally:
+        _password_jobs_in_flight -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
 def _create_token(subject: str, expires_minutes: int, secret_key: str, token_type: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
     to_encode: dict[str, Any] = {"sub": subject, "exp": expire, "type": token_type}
@@ -26,6 +63,7 @@ def _create_token(subject: str, expires_minutes: int, secret_key: str, token_typ
 
 
 def create_access_token(subject: str) -> str:
+    settings = get_settings()
     return _create_token(
         subject=subject,
         expires_minutes=settings.access_token_expire_minutes,
@@ -35,6 +73,7 @@ def create_access_token(subject: str) -> str:
 
 
 def create_refresh_token(subject: str) -> str:
+    settings = get_settings()
     return _create_token(
         subject=subject,
         expires_minutes=settings.refresh_token_expire_minutes,
@@ -44,5 +83,6 @@ def create_refresh_token(subject: str) -> str:
 
 
 def decode_token(token: str, refresh: bool = False) -> dict[str, Any]:
+    settings = get_settings()
     secret = settings.jwt_refresh_secret_key if refresh else settings.jwt_secret_key
     return jwt.decode(token, secret, algorithms=["HS256"])
@@ -1,18 +1,46 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from app.api.routes import auth_router, feed_router, health_router, videos_router
+from app.api.routes import (
+    auth_router,
+    feed_router,
+    health_router,
+    storage_events_router,
+    videos_router,
+)
+from app.core.config import get_settings
+from app.core.database import dispose_engine
 from app.core.errors import AppError, error_payload
 from app.core.logging import configure_logging
+from app.core.profiling import profiling_middleware
+from app.services.cache import close_redis
+from app.services.storage import close_async_s3_client
 
 configure_logging()
 
-app = FastAPI(title="Neo Reels Backend")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Engine, Redis and S3 clients are built on first use; only tear down what was created.
+    yield
+    await close_async_s3_client()
+    await close_redis()
+    await dispose_engine()
+
+
+app = FastAPI(title="Neo Reels Backend", lifespan=lifespan)
+
+if get_settings().request_profiling_enabled:
+    app.middleware("http")(profiling_middleware)
 
 app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(videos_router)
 app.include_router(feed_router)
+app.include_router(storage_events_router)
 
 
 @app.exception_handler(AppError)
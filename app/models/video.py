@@ -1,6 +1,7 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -16,14 +17,35 @@ class Video(Base):
     title: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     raw_object_key: Mapped[str] = mapped_column(String(1024), nullable=False)
+    multipart_upload_id: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    multipart_part_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    multipart_part_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    multipart_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(96), nullable=True, index=True)
     processed_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    manifest_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    renditions: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
     cover_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
 
     duration_sec: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Held by the transcode attempt currently working on the video; see claim_video_transcode.
+    transcode_claim: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    transcode_lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+
+Index(
+    "ix_videos_ready_created_at_id",
+    Video.created_at.desc(),
+    Video.id.desc(),
+    postgresql_where=Video.status == "ready",
+)
@@ -17,10 +17,41 @@ class VideoUploadInitResponse(BaseModel):
     video_id: UUID
 
 
+class VideoUploadPart(BaseModel):
+    part_number: int
+    upload_url: str
+
+
+class VideoUploadedPart(BaseModel):
+    part_number: int
+    etag: str
+    size: int
+
+
+class VideoMultipartUploadInitResponse(BaseModel):
+    video_id: UUID
+    object_key: str
+    upload_id: str
+    part_size: int
+    parts: list[VideoUploadPart]
+
+
+class VideoMultipartUploadStatusResponse(BaseModel):
+    video_id: UUID
+    upload_id: str
+    part_size: int
+    uploaded_parts: list[VideoUploadedPart]
+    pending_parts: list[VideoUploadPart]
+
+
 class VideoUploadCompleteRequest(BaseModel):
     video_id: UUID
 
 
+class VideoUploadCompleteBatchRequest(BaseModel):
+    video_ids: list[UUID] = Field(min_length=1)
+
+
 class VideoOut(BaseModel):
     id: UUID
     user_id: UUID
@@ -28,17 +59,40 @@ class VideoOut(BaseModel):
     title: str | None
     raw_object_key: str
     processed_object_key: str | None
+    manifest_object_key: str | None
+    renditions: list[str] | None
     cover_object_key: str | None
     duration_sec: int | None
     created_at: datetime
     updated_at: datetime
     error_message: str | None
+    playback_url: str | None = None
+    cover_url: str | None = None
+    progress_percent: int | None = None
 
     model_config = {"from_attributes": True}
 
 
-class FeedResponse(BaseModel):
+class VideoBatchOut(BaseModel):
     items: list[VideoOut]
+
+
+class FeedItemOut(BaseModel):
+    id: UUID
+    user_id: UUID
+    title: str | None
+    processed_object_key: str | None
+    renditions: list[str] | None
+    cover_object_key: str | None
+    duration_sec: int | None
+    created_at: datetime
+    playback_url: str | None
+    cover_url: str | None
+
+
+class FeedResponse(BaseModel):
+    items: list[FeedItemOut]
     limit: int
     offset: int
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
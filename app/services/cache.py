@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import random
+import secrets
+import time
+from functools import lru_cache
+from typing import cast
+
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FEED_VERSION_KEY = "feed:version"
+TRANSCODE_PROGRESS_KEY = "transcode:progress:{video_id}"
+FEED_LOCK_TTL_MS = 5000
+FEED_LOCK_WAIT_ATTEMPTS = 10
+FEED_LOCK_WAIT_SECONDS = 0.05
+# Deletes the lock only while it still holds our token, so a filler that outlived the TTL
+# cannot release a lock a newer filler has since taken.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_unavailable_logged_at: dict[str, float] = {}
+
+
+@lru_cache
+def get_redis() -> aioredis.Redis:
+    settings = get_settings()
+    return aioredis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=settings.redis_connect_timeout_seconds,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+    )
+
+
+async def close_redis() -> None:
+    if get_redis.cache_info().currsize:
+        await get_redis().aclose()
+        get_redis.cache_clear()
+
+
+@lru_cache
+def get_sync_redis() -> redis.Redis:
+    settings = get_settings()
+    return redis.Redis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=settings.redis_connect_timeout_seconds,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+    )
+
+
+def log_redis_unavailable(event: str, exc: RedisError) -> None:
+    # While Redis is down every request falls back; one line per interval is enough.
+    now = time.monotonic()
+    interval = get_settings().redis_unavailable_log_interval_seconds
+    if now - _unavailable_logged_at.get(event, -interval) < interval:
+        return
+    _unavailable_logged_at[event] = now
+    logger.warning("%s error=%r", event, exc)
+
+
+def feed_page_key(
+    version: int, limit: int, offset: int, cursor: str | None, include_total: bool
+) -> str:
+    position = f"c:{cursor}" if cursor is not None else f"o:{offset}"
+    return f"feed:v{version}:{limit}:{position}:{int(include_total)}"
+
+
+async def get_feed_version() -> int:
+    value = await get_redis().get(FEED_VERSION_KEY)
+    return int(value) if value is not None else 0
+
+
+async def get_cached_feed_page(key: str) -> bytes | None:
+    return cast(bytes | None, await get_redis().get(key))
+
+
+async def set_cached_feed_page(key: str, payload: bytes) -> None:
+    settings = get_settings()
+    # Jitter the TTL so pages filled together do not all expire together.
+    jitter = random.randint(0, max(settings.feed_cache_ttl_seconds // 5, 1))
+    await get_redis().set(key, payload, ex=settings.feed_cache_ttl_seconds + jitter)
+
+
+async def acquire_feed_fill_lock(key: str) -> str | None:
+    token = secrets.token_hex(16)
+    acquired = await get_redis().set(f"{key}:lock", token, nx=True, px=FEED_LOCK_TTL_MS)
+    return token if acquired else None
+
+
+async def release_feed_fill_lock(key: str, token: str) -> None:
+    await get_redis().eval(_RELEASE_LOCK_SCRIPT, 1, f"{key}:lock", token)
+
+
+async def wait_for_feed_page(key: str) -> bytes | None:
+    for _ in range(FEED_LOCK_WAIT_ATTEMPTS):
+        await asyncio.sleep(FEED_LOCK_WAIT_SECONDS)
+        payload = await get_cached_feed_page(key)
+        if payload is not None:
+            return payload
+    return None
+
+
+def invalidate_feed_cache() -> None:
+    try:
+        get_sync_redis().incr(FEED_VERSION_KEY)
+    except RedisError:
+        logger.exception("feed_cache_invalidate_failed")
+
+
+def set_transcode_progress(video_id: str, percent: int) -> None:
+    settings = get_settings()
+    try:
+        get_sync_redis().set(
+            TRANSCODE_PROGRESS_KEY.format(video_id=video_id),
+            percent,
+            ex=settings.transcode_progress_ttl_seconds,
+        )
+    except RedisError:
+        logger.warning("transcode_progress_update_failed video_id=%s", video_id, exc_info=True)
+
+
+async def clear_transcode_progress(video_ids: list[str]) -> None:
+    # A re-processed video must not report the previous attempt's percentage.
+    if not video_ids:
+        return
+    keys = [TRANSCODE_PROGRESS_KEY.format(video_id=video_id) for video_id in video_ids]
+    try:
+        await get_redis().delete(*keys)
+    except RedisError as exc:
+        log_redis_unavailable("transcode_progress_clear_failed", exc)
+
+
+async def get_transcode_progress(video_id: str) -> int | None:
+    value = await get_redis().get(TRANSCODE_PROGRESS_KEY.format(video_id=video_id))
+    return int(value) if value is not None else None
@@ -1,25 +1,74 @@
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import AsyncExitStack, contextmanager
 from functools import lru_cache
-
-import boto3
-from botocore.exceptions import ClientError
+from typing import TYPE_CHECKING
 
 from app.core.config import get_settings
+from app.core.profiling import instrument_s3_client
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+
+_async_s3_client = None
+_async_s3_stack: AsyncExitStack | None = None
+_async_s3_lock = asyncio.Lock()
+
+
+class StorageError(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+@contextmanager
+def _storage_errors() -> Iterator[None]:
+    # Callers see StorageError, so the API never has to import botocore itself.
+    from botocore.exceptions import ClientError
+
+    try:
+        yield
+    except ClientError as exc:
+        raise StorageError(exc.response.get("Error", {}).get("Code", "")) from exc
+
+
+def _client_config() -> "Config":
+    from botocore.config import Config
+
+    settings = get_settings()
+    return Config(
+        max_pool_connections=settings.s3_max_pool_connections,
+        connect_timeout=settings.s3_connect_timeout_seconds,
+        read_timeout=settings.s3_read_timeout_seconds,
+        retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+    )
 
 
 @lru_cache
 def get_s3_client():
+    # boto3 and aiobotocore pull in most of botocore on import; defer that to first use so
+    # importing the API does not pay for it.
+    import boto3
+
     settings = get_settings()
-    return boto3.client(
+    client = boto3.client(
         "s3",
         endpoint_url=settings.minio_endpoint,
         aws_access_key_id=settings.minio_access_key,
         aws_secret_access_key=settings.minio_secret_key,
         region_name=settings.minio_region,
+        config=_client_config(),
     )
+    if settings.request_profiling_enabled:
+        instrument_s3_client(client)
+    return client
 
 
 @lru_cache
 def get_public_s3_client():
+    import boto3
+
     settings = get_settings()
     endpoint = settings.minio_public_endpoint or settings.minio_endpoint
     return boto3.client(
@@ -28,9 +77,43 @@ def get_public_s3_client():
         aws_access_key_id=settings.minio_access_key,
         aws_secret_access_key=settings.minio_secret_key,
         region_name=settings.minio_region,
+        config=_client_config(),
     )
 
 
+async def get_async_s3_client():
+    global _async_s3_client, _async_s3_stack
+    async with _async_s3_lock:
+        if _async_s3_client is None:
+            from aiobotocore.session import get_session as get_aiobotocore_session
+
+            settings = get_settings()
+            stack = AsyncExitStack()
+            _async_s3_client = await stack.enter_async_context(
+                get_aiobotocore_session().create_client(
+                    "s3",
+                    endpoint_url=settings.minio_endpoint,
+                    aws_access_key_id=settings.minio_access_key,
+                    aws_secret_access_key=settings.minio_secret_key,
+                    region_name=settings.minio_region,
+                    config=_client_config(),
+                )
+            )
+            _async_s3_stack = stack
+            if settings.request_profiling_enabled:
+                instrument_s3_client(_async_s3_client)
+    return _async_s3_client
+
+
+async def close_async_s3_client() -> None:
+    global _async_s3_client, _async_s3_stack
+    async with _async_s3_lock:
+        if _async_s3_stack is not None:
+            await _async_s3_stack.aclose()
+        _async_s3_client = None
+        _async_s3_stack = None
+
+
 def generate_presigned_put_url(object_key: str, content_type: str, expires_in: int = 900) -> str:
     settings = get_settings()
     client = get_public_s3_client()
@@ -45,11 +128,123 @@ def generate_presigned_put_url(object_key: str, content_type: str, expires_in: i
     )
 
 
+def generate_presigned_part_url(
+    object_key: str, upload_id: str, part_number: int, expires_in: int
+) -> str:
+    settings = get_settings()
+    client = get_public_s3_client()
+    return client.generate_presigned_url(
+        ClientMethod="upload_part",
+        Params={
+            "Bucket": settings.minio_bucket,
+            "Key": object_key,
+            "UploadId": upload_id,
+            "PartNumber": part_number,
+        },
+        ExpiresIn=expires_in,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _presigned_get_url(object_key: str, expires_in: int, expiry_bucket: int) -> str:
+    settings = get_settings()
+    client = get_public_s3_client()
+    return client.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": settings.minio_bucket, "Key": object_key},
+        ExpiresIn=expires_in,
+    )
+
+
+def generate_presigned_get_url(object_key: str, expires_in: int | None = None) -> str:
+    settings = get_settings()
+    expires_in = expires_in or settings.presigned_get_expire_seconds
+    # URLs are reused for half their lifetime, so a cached URL is always valid for at
+    # least expires_in / 2 seconds after it is handed out.
+    expiry_bucket = int(time.time()) // max(expires_in // 2, 1)
+    return _presigned_get_url(object_key, expires_in, expiry_bucket)
+
+
 def object_exists(object_key: str) -> bool:
     settings = get_settings()
     client = get_s3_client()
     try:
-        client.head_object(Bucket=settings.minio_bucket, Key=object_key)
+        with _storage_errors():
+            client.head_object(Bucket=settings.minio_bucket, Key=object_key)
         return True
-    except ClientError:
+    except StorageError:
         return False
+
+
+async def object_size_async(object_key: str) -> int | None:
+    settings = get_settings()
+    client = await get_async_s3_client()
+    try:
+        with _storage_errors():
+            response = await client.head_object(Bucket=settings.minio_bucket, Key=object_key)
+    except StorageError:
+        return None
+    return response["ContentLength"]
+
+
+async def create_multipart_upload_async(object_key: str, content_type: str) -> str:
+    settings = get_settings()
+    client = await get_async_s3_client()
+    with _storage_errors():
+        response = await client.create_multipart_upload(
+            Bucket=settings.minio_bucket, Key=object_key, ContentType=content_type
+        )
+    return response["UploadId"]
+
+
+async def list_uploaded_parts_async(object_key: str, upload_id: str) -> list[dict]:
+    settings = get_settings()
+    client = await get_async_s3_client()
+    paginator = client.get_paginator("list_parts")
+    parts: list[dict] = []
+    with _storage_errors():
+        async for page in paginator.paginate(
+            Bucket=settings.minio_bucket, Key=object_key, UploadId=upload_id
+        ):
+            parts.extend(page.get("Parts", []))
+    return parts
+
+
+async def complete_multipart_upload_async(
+    object_key: str, upload_id: str, parts: list[dict]
+) -> None:
+    settings = get_settings()
+    client = await get_async_s3_client()
+    with _storage_errors():
+        await client.complete_multipart_upload(
+            Bucket=settings.minio_bucket,
+            Key=object_key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["PartNumber"], "ETag": part["ETag"]}
+                    for part in sorted(parts, key=lambda part: part["PartNumber"])
+                ]
+            },
+        )
+
+
+async def abort_multipart_upload_async(object_key: str, upload_id: str) -> None:
+    settings = get_settings()
+    client = await get_async_s3_client()
+    with _storage_errors():
+        await client.abort_multipart_upload(
+            Bucket=settings.minio_bucket, Key=object_key, UploadId=upload_id
+        )
+
+
+def delete_prefix(prefix: str) -> None:
+    settings = get_settings()
+    client = get_s3_client()
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=settings.minio_bucket, Prefix=prefix):
+        keys = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+        if keys:
+            client.delete_objects(
+                Bucket=settings.minio_bucket, Delete={"Objects": keys, "Quiet": True}
+            )
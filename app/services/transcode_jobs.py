@@ -0,0 +1,19 @@
+from uuid import UUID
+
+
+def enqueue_transcodes(sizes_by_video_id: dict[UUID, int | None]) -> None:
+    # Celery and its broker client are imported on the first enqueue, not when the API starts.
+    from celery import group
+
+    from app.tasks.worker import celery_app, transcode_queue_for
+
+    signatures = [
+        celery_app.signature(
+            "transcode_video", args=[str(video_id)], queue=transcode_queue_for(size_bytes)
+        )
+        for video_id, size_bytes in sizes_by_video_id.items()
+    ]
+    if len(signatures) == 1:
+        signatures[0].apply_async()
+    elif signatures:
+        group(signatures).apply_async()
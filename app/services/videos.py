@@ -0,0 +1,148 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.video import Video
+
+# Target status -> statuses a video may move into it from (pending -> processing -> ready/failed,
+# with failed videos allowed back into processing on retry). processing -> processing only
+# happens through claim_video_transcode, which is guarded by the transcode lease.
+VIDEO_STATUS_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "processing": ("pending", "processing", "failed"),
+    "ready": ("processing",),
+    "failed": ("pending", "processing"),
+}
+
+# Values that drop a video's multipart upload state once the upload is finished or abandoned.
+MULTIPART_UPLOAD_CLEARED: dict[str, Any] = {
+    "multipart_upload_id": None,
+    "multipart_part_size": None,
+    "multipart_part_count": None,
+    "multipart_size_bytes": None,
+}
+
+
+async def transition_videos_status(
+    session: AsyncSession,
+    video_ids: list[uuid.UUID],
+    status: str,
+    *,
+    from_statuses: tuple[str, ...] | None = None,
+    user_id: uuid.UUID | None = None,
+    transcode_claim: str | None = None,
+    values: dict[str, Any] | None = None,
+) -> list[Video]:
+    allowed = VIDEO_STATUS_TRANSITIONS[status]
+    if from_statuses is not None:
+        allowed = tuple(s for s in from_statuses if s in allowed)
+
+    stmt = (
+        update(Video)
+        .where(Video.id.in_(video_ids), Video.status.in_(allowed))
+        .values(status=status, **(values or {}))
+        .returning(Video)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Video.user_id == user_id)
+    if transcode_claim is not None:
+        stmt = stmt.where(Video.transcode_claim == transcode_claim)
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def transition_video_status(
+    session: AsyncSession,
+    video_id: uuid.UUID,
+    status: str,
+    *,
+    from_statuses: tuple[str, ...] | None = None,
+    user_id: uuid.UUID | None = None,
+    transcode_claim: str | None = None,
+    values: dict[str, Any] | None = None,
+) -> Video | None:
+    videos = await transition_videos_status(
+        session,
+        [video_id],
+        status,
+        from_statuses=from_statuses,
+        user_id=user_id,
+        transcode_claim=transcode_claim,
+        values=values,
+    )
+    return videos[0] if videos else None
+
+
+async def claim_video_transcode(
+    session: AsyncSession, video_id: uuid.UUID, claim: str, lease_seconds: int
+) -> Video | None:
+    # Only one transcode attempt may hold a video at a time. A redelivered or duplicated task
+    # finds the lease held and backs off; a lease left by a dead worker expires and is taken.
+    now = func.now()
+    stmt = (
+        update(Video)
+        .where(
+            Video.id == video_id,
+            Video.status.in_(VIDEO_STATUS_TRANSITIONS["processing"]),
+            or_(
+                Video.transcode_lease_expires_at.is_(None),
+                Video.transcode_lease_expires_at < now,
+            ),
+        )
+        .values(
+            status="processing",
+            error_message=None,
+            transcode_claim=claim,
+            transcode_lease_expires_at=now + timedelta(seconds=lease_seconds),
+        )
+        .returning(Video)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def renew_video_transcode_lease(
+    session: AsyncSession, video_id: uuid.UUID, claim: str, lease_seconds: int
+) -> bool:
+    result = await session.execute(
+        update(Video)
+        .where(
+            Video.id == video_id,
+            Video.status == "processing",
+            Video.transcode_claim == claim,
+        )
+        .values(
+            transcode_lease_expires_at=func.now() + timedelta(seconds=lease_seconds)
+        )
+        .returning(Video.id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def get_video_transcode_lease(
+    session: AsyncSession, video_id: uuid.UUID
+) -> tuple[str, datetime | None] | None:
+    result = await session.execute(
+        select(Video.status, Video.transcode_lease_expires_at).where(Video.id == video_id)
+    )
+    row = result.one_or_none()
+    return (row.status, row.transcode_lease_expires_at) if row is not None else None
+
+
+async def find_ready_video_by_content_hash(
+    session: AsyncSession, content_hash: str, exclude_id: uuid.UUID
+) -> Video | None:
+    result = await session.execute(
+        select(Video)
+        .where(
+            Video.content_hash == content_hash,
+            Video.status == "ready",
+            Video.id != exclude_id,
+        )
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
@@ -0,0 +1,19 @@
+from app.core.config import get_settings
+
+# Loaded by Celery the first time the app configuration is read (worker start or the first
+# send_task), not when app.tasks.worker is imported.
+broker_url = get_settings().redis_url
+result_backend = get_settings().redis_url
+task_default_queue = "default"
+beat_schedule = {
+    "cleanup-stale-multipart-uploads": {
+        "task": "cleanup_stale_multipart_uploads",
+        "schedule": 3600.0,
+    },
+}
+task_acks_late = True
+task_reject_on_worker_lost = True
+worker_prefetch_multiplier = 1
+broker_transport_options = {
+    "visibility_timeout": get_settings().celery_visibility_timeout_seconds,
+}
@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+TRANSCODE_STAGE_SECONDS = Histogram(
+    "transcode_stage_seconds",
+    "Time spent in each transcode pipeline stage",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+TRANSCODE_BYTES = Counter(
+    "transcode_bytes",
+    "Bytes read from and written to object storage by transcodes",
+    ["direction"],
+)
+TRANSCODE_RESULTS = Counter(
+    "transcode_results",
+    "Finished transcode tasks by outcome",
+    ["outcome"],
+)
+
+
+@contextmanager
+def transcode_stage(video_id: str, stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        TRANSCODE_STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        logger.info("transcode_stage video_id=%s stage=%s seconds=%.3f", video_id, stage, elapsed)
+
+
+def start_metrics_server(port: int) -> None:
+    # Prefork children each keep their own counters; with PROMETHEUS_MULTIPROC_DIR set they
+    # write them to shared files that the parent aggregates on scrape.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+    logger.info("metrics_server_started port=%s", port)
@@ -1,69 +1,281 @@
 import asyncio
+import hashlib
+import itertools
+import json
 import logging
+import mimetypes
 import os
 import subprocess
 import tempfile
+import threading
+import time
 import uuid
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import select
+from boto3.s3.transfer import TransferConfig
 
 from app.core.config import get_settings
-from app.core.database import AsyncSessionLocal
+from app.core.database import get_sessionmaker
 from app.models.video import Video
-from app.services.storage import get_s3_client
-from app.tasks.worker import celery_app
+from app.services.cache import invalidate_feed_cache, set_transcode_progress
+from app.services.storage import delete_prefix, get_s3_client
+from app.services.videos import (
+    claim_video_transcode,
+    find_ready_video_by_content_hash,
+    get_video_transcode_lease,
+    renew_video_transcode_lease,
+    transition_video_status,
+)
+from app.tasks.metrics import TRANSCODE_BYTES, TRANSCODE_RESULTS, transcode_stage
+from app.tasks.worker import TRANSCODE_RETRY_QUEUE, celery_app, run_async
 
 logger = logging.getLogger(__name__)
 
+_HLS_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
 
-async def _get_video(video_id: str) -> Video | None:
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Video).where(Video.id == uuid.UUID(video_id))
+
+class _ClaimLost(Exception):
+    pass
+
+
+class _DuplicateFound(Exception):
+    def __init__(self, duplicate: Video, content_hash: str):
+        super().__init__(str(duplicate.id))
+        self.duplicate = duplicate
+        self.content_hash = content_hash
+
+
+async def _claim_video(video_id: str, claim: str) -> tuple[Video | None, float | None]:
+    # Returns the claimed video, or None plus how long to wait when another attempt holds it.
+    lease_seconds = get_settings().transcode_lease_seconds
+    with transcode_stage(video_id, "db"):
+        async with get_sessionmaker()() as session:
+            video = await claim_video_transcode(
+                session, uuid.UUID(video_id), claim, lease_seconds
+            )
+            await session.commit()
+            if video is not None:
+                return video, None
+            lease = await get_video_transcode_lease(session, uuid.UUID(video_id))
+
+    if lease is None:
+        return None, None
+    status, expires_at = lease
+    if status != "processing" or expires_at is None:
+        return None, None
+    return None, max((expires_at - datetime.now(timezone.utc)).total_seconds(), 0) + 1
+
+
+async def _renew_claim(video_id: str, claim: str) -> None:
+    async with get_sessionmaker()() as session:
+        renewed = await renew_video_transcode_lease(
+            session, uuid.UUID(video_id), claim, get_settings().transcode_lease_seconds
         )
-        return result.scalar_one_or_none()
+        await session.commit()
+    if not renewed:
+        raise _ClaimLost(video_id)
 
 
 async def _update_video(
-    video_id: str,
-    status: str,
-    processed_key: str | None = None,
-    cover_key: str | None = None,
-    duration_sec: int | None = None,
-    error_message: str | None = None,
+    video_id: str, status: str, claim: str, values: dict[str, Any] | None = None
+) -> Video | None:
+    with transcode_stage(video_id, "db"):
+        async with get_sessionmaker()() as session:
+            video = await transition_video_status(
+                session,
+                uuid.UUID(video_id),
+                status,
+                transcode_claim=claim,
+                values={
+                    **(values or {}),
+                    "transcode_claim": None,
+                    "transcode_lease_expires_at": None,
+                },
+            )
+            await session.commit()
+
+    if video is not None and status == "ready":
+        invalidate_feed_cache()
+    return video
+
+
+async def _find_duplicate(video_id: str, content_hash: str) -> Video | None:
+    with transcode_stage(video_id, "db"):
+        async with get_sessionmaker()() as session:
+            return await find_ready_video_by_content_hash(
+                session, content_hash, exclude_id=uuid.UUID(video_id)
+            )
+
+
+def _fingerprint(chunks: Iterable[bytes]) -> str:
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    TRANSCODE_BYTES.labels(direction="in").inc(size)
+    return f"{digest.hexdigest()}:{size}"
+
+
+def _iter_file(path: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _fingerprint_object(
+    client, bucket: str, key: str, video_id: str, stop: threading.Event
+) -> str:
+    # Runs next to ffmpeg in streaming mode; the result is ignored once stop is set.
+    with transcode_stage(video_id, "fingerprint"):
+        body = client.get_object(Bucket=bucket, Key=key)["Body"]
+        try:
+            chunks = body.iter_chunks(1024 * 1024)
+            return _fingerprint(itertools.takewhile(lambda _: not stop.is_set(), chunks))
+        finally:
+            body.close()
+
+
+async def _mark_duplicate(video_id: str, claim: str, duplicate: Video, content_hash: str) -> None:
+    # Same bytes were already transcoded: point at the existing outputs.
+    ready = await _update_video(
+        video_id,
+        "ready",
+        claim,
+        {
+            "processed_object_key": duplicate.processed_object_key,
+            "manifest_object_key": duplicate.manifest_object_key,
+            "renditions": duplicate.renditions,
+            "cover_object_key": duplicate.cover_object_key,
+            "duration_sec": duplicate.duration_sec,
+            "content_hash": content_hash,
+            "error_message": None,
+        },
+    )
+    if ready is None:
+        raise _ClaimLost(video_id)
+    TRANSCODE_RESULTS.labels(outcome="deduplicated").inc()
+    logger.info(
+        "video_status_change video_id=%s status=ready deduplicated_from=%s",
+        video_id,
+        duplicate.id,
+    )
+
+
+async def _ffmpeg_run(
+    args: list[str], stderr_path: str, on_poll: Callable[[], Awaitable[None]]
 ) -> None:
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Video).where(Video.id == uuid.UUID(video_id))
+    # stderr goes to a file so a chatty ffmpeg can never block on a full pipe.
+    with open(stderr_path, "w+") as stderr:
+        process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=stderr)
+        try:
+            while process.poll() is None:
+                await on_poll()
+                await asyncio.sleep(0.5)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, args, stderr=stderr.read())
+
+
+def _read_progress_us(progress_path: str) -> int | None:
+    # ffmpeg appends key=value blocks to the -progress file; only the tail is of interest.
+    try:
+        with open(progress_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            tail = f.read().decode(errors="ignore")
+    except FileNotFoundError:
+        return None
+    for line in reversed(tail.splitlines()):
+        key, _, value = line.partition("=")
+        if key == "out_time_us" and value.strip().isdigit():
+            return int(value)
+    return None
+
+
+def _content_type(name: str) -> str:
+    extension = os.path.splitext(name)[1]
+    content_type = _HLS_CONTENT_TYPES.get(extension) or mimetypes.guess_type(name)[0]
+    return content_type or "application/octet-stream"
+
+
+# Uploads HLS segments while ffmpeg is still encoding. With the temp_file HLS flag a segment
+# only appears under its final name once complete, so every *.m4s can be uploaded and deleted
+# right away and peak disk use stays at a few segments.
+class _HlsUploader:
+    def __init__(self, client, bucket: str, local_dir: str, key_prefix: str, concurrency: int):
+        self.client = client
+        self.bucket = bucket
+        self.local_dir = local_dir
+        self.key_prefix = key_prefix
+        self.transfer_config = TransferConfig(max_concurrency=concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="hls-upload")
+        self.pending: dict[str, Future] = {}
+        self.bytes_uploaded = 0
+        self._bytes_lock = threading.Lock()
+
+    def _upload(self, name: str, remove: bool) -> None:
+        path = os.path.join(self.local_dir, name)
+        size = os.path.getsize(path)
+        self.client.upload_file(
+            path,
+            self.bucket,
+            f"{self.key_prefix}/{name}",
+            ExtraArgs={"ContentType": _content_type(name)},
+            Config=self.transfer_config,
         )
-        video = result.scalar_one_or_none()
-        if video is None:
-            return
-        video.status = status
-        if processed_key is not None:
-            video.processed_object_key = processed_key
-        if cover_key is not None:
-            video.cover_object_key = cover_key
-        if duration_sec is not None:
-            video.duration_sec = duration_sec
-        video.error_message = error_message
-        await session.commit()
+        with self._bytes_lock:
+            self.bytes_uploaded += size
+        if remove:
+            os.remove(path)
+
+    def upload_ready_segments(self) -> None:
+        for name in os.listdir(self.local_dir):
+            if name.endswith(".m4s") and name not in self.pending:
+                self.pending[name] = self.executor.submit(self._upload, name, True)
+        for future in [future for future in self.pending.values() if future.done()]:
+            future.result()
 
+    def finish(self) -> None:
+        try:
+            self.upload_ready_segments()
+            for future in self.pending.values():
+                future.result()
+            # Init files and variant playlists next, the master playlist last so it never
+            # references objects that are not there yet.
+            remaining = sorted(name for name in os.listdir(self.local_dir) if name != "master.m3u8")
+            for future in [self.executor.submit(self._upload, name, False) for name in remaining]:
+                future.result()
+            self._upload("master.m3u8", False)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
 
-def _ffmpeg_run(args: list[str]) -> None:
-    subprocess.run(args, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    def abort(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
 
 
-def _get_duration_sec(input_path: str) -> int | None:
+def _probe(input_path: str) -> tuple[int | None, bool, int | None]:
+    # Reads container and stream headers only; nothing is decoded.
     result = subprocess.run(
         [
             "ffprobe",
             "-v",
             "error",
             "-show_entries",
-            "format=duration",
+            "stream=codec_type,height:format=duration",
             "-of",
-            "default=noprint_wrappers=1:nokey=1",
+            "json",
             input_path,
         ],
         check=True,
@@ -71,104 +283,297 @@ def _get_duration_sec(input_path: str) -> int | None:
         stderr=subprocess.PIPE,
         text=True,
     )
-    value = result.stdout.strip()
-    if not value:
-        return None
-    return int(float(value))
+    info = json.loads(result.stdout or "{}")
+    streams = info.get("streams", [])
+    heights = [s["height"] for s in streams if s.get("codec_type") == "video" and s.get("height")]
+    has_audio = any(s.get("codec_type") == "audio" for s in streams)
+    duration = info.get("format", {}).get("duration")
+    return (
+        max(heights) if heights else None,
+        has_audio,
+        int(float(duration)) if duration else None,
+    )
+
+
+def _select_renditions(ladder: dict[int, int], source_height: int | None) -> list[int]:
+    heights = sorted(ladder)
+    if source_height is None:
+        return heights
+    fitting = [height for height in heights if height <= source_height]
+    return fitting or heights[:1]
+
+
+def _build_hls_command(
+    input_path: str,
+    output_dir: str,
+    cover_path: str,
+    heights: list[int],
+    ladder: dict[int, int],
+    has_audio: bool,
+    segment_seconds: int,
+    progress_path: str,
+    *,
+    preset: str,
+    crf: int,
+    threads: int,
+    audio_kbps: int,
+) -> list[str]:
+    # A single decode is split into one scaled branch per rendition plus a cover branch.
+    branches = "".join(f"[v{index}]" for index in range(len(heights)))
+    filters = [f"[0:v]split={len(heights) + 1}{branches}[thumb]"]
+    filters += [f"[v{index}]scale=-2:{height}[v{index}out]" for index, height in enumerate(heights)]
+    filters.append("[thumb]select='gte(t,1)'[cover]")
+
+    args = ["ffmpeg", "-y", "-progress", progress_path, "-nostats"]
+    args += ["-i", input_path, "-filter_complex", ";".join(filters)]
+    stream_map = []
+    for index, height in enumerate(heights):
+        args += ["-map", f"[v{index}out]"]
+        if has_audio:
+            args += ["-map", "0:a:0"]
+        kbps = ladder[height]
+        args += [f"-maxrate:v:{index}", f"{kbps}k", f"-bufsize:v:{index}", f"{kbps * 2}k"]
+        stream_map.append(
+            f"v:{index},a:{index},name:{height}p" if has_audio else f"v:{index},name:{height}p"
+        )
+
+    args += [
+        "-c:v",
+        "libx264",
+        "-preset",
+        preset,
+        "-crf",
+        str(crf),
+        "-threads",
+        str(threads),
+        "-sc_threshold",
+        "0",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{segment_seconds})",
+    ]
+    if has_audio:
+        args += ["-c:a", "aac", "-b:a", f"{audio_kbps}k"]
+    args += [
+        "-f",
+        "hls",
+        "-hls_time",
+        str(segment_seconds),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_flags",
+        "independent_segments+temp_file",
+        "-hls_segment_type",
+        "fmp4",
+        "-hls_fmp4_init_filename",
+        "init_%v.mp4",
+        "-hls_segment_filename",
+        os.path.join(output_dir, "segment_%v_%05d.m4s"),
+        "-master_pl_name",
+        "master.m3u8",
+        "-var_stream_map",
+        " ".join(stream_map),
+        os.path.join(output_dir, "stream_%v.m3u8"),
+        "-map",
+        "[cover]",
+        "-frames:v",
+        "1",
+        "-q:v",
+        "2",
+        cover_path,
+    ]
+    return args
 
 
 @celery_app.task(bind=True, name="transcode_video")
 def transcode_video(self, video_id: str) -> None:
     settings = get_settings()
     client = get_s3_client()
+    # Unique per attempt, so a redelivery of this same message cannot pass for the holder.
+    claim = uuid.uuid4().hex
 
-    logger.info("video_status_change video_id=%s status=processing", video_id)
+    async def _transcode(
+        video: Video, tmpdir: str, stop_hashing: threading.Event, hashing: ThreadPoolExecutor
+    ) -> None:
+        content_hash: str | None = None
+        hash_future: Future | None = None
+        if settings.transcode_streaming_input:
+            # ffmpeg reads the upload over HTTP with range requests instead of a copy, and the
+            # fingerprint is read alongside it so deduplication adds no serial pass.
+            input_path = client.generate_presigned_url(
+                ClientMethod="get_object",
+                Params={"Bucket": settings.minio_bucket, "Key": video.raw_object_key},
+                ExpiresIn=6 * 3600,
+            )
+            hash_future = hashing.submit(
+                _fingerprint_object,
+                client,
+                settings.minio_bucket,
+                video.raw_object_key,
+                video_id,
+                stop_hashing,
+            )
+        else:
+            input_path = os.path.join(tmpdir, "input")
+            with transcode_stage(video_id, "fingerprint"):
+                client.download_file(settings.minio_bucket, video.raw_object_key, input_path)
+                content_hash = _fingerprint(_iter_file(input_path))
+            duplicate = await _find_duplicate(video_id, content_hash)
+            if duplicate is not None:
+                raise _DuplicateFound(duplicate, content_hash)
 
-    async def _process() -> None:
-        video = await _get_video(video_id)
-        if video is None:
-            return
-        if video.status == "ready":
-            return
-        await _update_video(video_id, status="processing", error_message=None)
+        async def _check_fingerprint(wait: bool) -> None:
+            nonlocal content_hash, hash_future
+            if hash_future is None or not (wait or hash_future.done()):
+                return
+            streamed_hash = await asyncio.wrap_future(hash_future)
+            content_hash, hash_future = streamed_hash, None
+            duplicate = await _find_duplicate(video_id, streamed_hash)
+            if duplicate is not None:
+                raise _DuplicateFound(duplicate, streamed_hash)
 
-        with tempfile.TemporaryDirectory(prefix="transcode_") as tmpdir:
-            input_path = os.path.join(tmpdir, "input")
-            client.download_file(settings.minio_bucket, video.raw_object_key, input_path)
-
-            output_video = os.path.join(tmpdir, "output_720p.mp4")
-            cover_path = os.path.join(tmpdir, "cover.jpg")
-
-            _ffmpeg_run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    input_path,
-                    "-vf",
-                    "scale=-2:720",
-                    "-c:v",
-                    "libx264",
-                    "-preset",
-                    "fast",
-                    "-crf",
-                    "23",
-                    "-c:a",
-                    "aac",
-                    "-movflags",
-                    "+faststart",
-                    output_video,
-                ]
-            )
+        hls_dir = os.path.join(tmpdir, "hls")
+        os.makedirs(hls_dir)
+        cover_path = os.path.join(tmpdir, "cover.jpg")
+        progress_path = os.path.join(tmpdir, "progress.txt")
 
-            _ffmpeg_run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-ss",
-                    "1",
-                    "-i",
-                    input_path,
-                    "-vframes",
-                    "1",
-                    "-q:v",
-                    "2",
-                    cover_path,
-                ]
-            )
+        prefix = f"processed/{video_id}"
+        manifest_key = f"{prefix}/hls/master.m3u8"
+        cover_key = f"{prefix}/cover.jpg"
 
-            duration = _get_duration_sec(input_path)
+        with transcode_stage(video_id, "probe"):
+            source_height, has_audio, duration = _probe(input_path)
+        ladder = settings.transcode_ladder
+        heights = _select_renditions(ladder, source_height)
+        uploader = _HlsUploader(
+            client,
+            settings.minio_bucket,
+            hls_dir,
+            f"{prefix}/hls",
+            settings.transcode_upload_concurrency,
+        )
+        last_percent = -1
+        renewed_at = time.monotonic()
 
-            processed_key = f"processed/{video_id}/video_720p.mp4"
-            cover_key = f"processed/{video_id}/cover.jpg"
+        async def _on_poll() -> None:
+            nonlocal last_percent, renewed_at
+            await _check_fingerprint(wait=False)
+            uploader.upload_ready_segments()
+            if time.monotonic() - renewed_at >= settings.transcode_lease_seconds / 3:
+                await _renew_claim(video_id, claim)
+                renewed_at = time.monotonic()
+            out_time_us = _read_progress_us(progress_path)
+            if not duration or out_time_us is None:
+                return
+            percent = min(int(out_time_us / (duration * 10_000)), 99)
+            if percent != last_percent:
+                last_percent = percent
+                set_transcode_progress(video_id, percent)
 
-            client.upload_file(
-                output_video,
-                settings.minio_bucket,
-                processed_key,
-                ExtraArgs={"ContentType": "video/mp4"},
-            )
+        try:
+            # Segment uploads overlap with encoding, so this stage covers both.
+            with transcode_stage(video_id, "encode"):
+                await _ffmpeg_run(
+                    _build_hls_command(
+                        input_path,
+                        hls_dir,
+                        cover_path,
+                        heights,
+                        ladder,
+                        has_audio,
+                        settings.hls_segment_seconds,
+                        progress_path,
+                        preset=settings.transcode_preset,
+                        crf=settings.transcode_crf,
+                        threads=settings.transcode_threads,
+                        audio_kbps=settings.transcode_audio_bitrate_kbps,
+                    ),
+                    os.path.join(tmpdir, "ffmpeg.log"),
+                    _on_poll,
+                )
+        except BaseException:
+            uploader.abort()
+            raise
+
+        # Outputs are only referenced once the video is marked ready, so a duplicate found
+        # now still wins over this encode.
+        await _check_fingerprint(wait=True)
+        with transcode_stage(video_id, "upload"):
+            uploader.finish()
             client.upload_file(
                 cover_path,
                 settings.minio_bucket,
                 cover_key,
                 ExtraArgs={"ContentType": "image/jpeg"},
             )
+        TRANSCODE_BYTES.labels(direction="out").inc(
+            uploader.bytes_uploaded + os.path.getsize(cover_path)
+        )
 
-            await _update_video(
-                video_id,
-                status="ready",
-                processed_key=processed_key,
-                cover_key=cover_key,
-                duration_sec=duration,
-                error_message=None,
-            )
-            logger.info("video_status_change video_id=%s status=ready", video_id)
+        ready = await _update_video(
+            video_id,
+            "ready",
+            claim,
+            {
+                "processed_object_key": manifest_key,
+                "manifest_object_key": manifest_key,
+                "renditions": [f"{height}p" for height in heights],
+                "cover_object_key": cover_key,
+                "duration_sec": duration,
+                "content_hash": content_hash,
+                "error_message": None,
+            },
+        )
+        if ready is None:
+            raise _ClaimLost(video_id)
+        set_transcode_progress(video_id, 100)
+        TRANSCODE_RESULTS.labels(outcome="ready").inc()
+        logger.info("video_status_change video_id=%s status=ready", video_id)
+
+    async def _process() -> float | None:
+        # Returns seconds to wait when another attempt holds the video's transcode lease.
+        video, retry_after = await _claim_video(video_id, claim)
+        if video is None:
+            return retry_after
+        # Retries and lease takeovers start over, so drop the previous attempt's progress.
+        set_transcode_progress(video_id, 0)
+        logger.info("video_status_change video_id=%s status=processing", video_id)
+
+        with tempfile.TemporaryDirectory(prefix="transcode_") as tmpdir:
+            stop_hashing = threading.Event()
+            hashing = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fingerprint")
+            try:
+                await _transcode(video, tmpdir, stop_hashing, hashing)
+            except _DuplicateFound as found:
+                await _mark_duplicate(video_id, claim, found.duplicate, found.content_hash)
+                # Only once the claim-guarded update succeeded: had the lease lapsed, these keys
+                # would now hold the new lease holder's segments.
+                delete_prefix(f"processed/{video_id}/")
+            finally:
+                stop_hashing.set()
+                hashing.shutdown(wait=True)
+        return None
 
     try:
-        asyncio.run(_process())
+        retry_after = run_async(_process())
+    except _ClaimLost:
+        # Our lease lapsed and another attempt took the video over; its result stands.
+        logger.warning("transcode_claim_lost video_id=%s", video_id)
+        return
     except Exception as exc:
         message = str(exc)
-        asyncio.run(_update_video(video_id, status="failed", error_message=message))
+        run_async(_update_video(video_id, "failed", claim, {"error_message": message}))
+        TRANSCODE_RESULTS.labels(outcome="failed").inc()
         logger.exception("video_status_change video_id=%s status=failed", video_id)
+        if self.request.retries < settings.transcode_max_retries:
+            # Retries go to their own queue so they never hold up fresh short clips.
+            raise self.retry(
+                exc=exc,
+                queue=TRANSCODE_RETRY_QUEUE,
+                countdown=settings.transcode_retry_delay_seconds,
+            ) from exc
         raise
+
+    if retry_after is not None:
+        # Another attempt is transcoding this video; check back once its lease could lapse.
+        logger.info("transcode_already_claimed video_id=%s", video_id)
+        raise self.retry(queue=TRANSCODE_RETRY_QUEUE, countdown=retry_after, max_retries=None)
@@ -0,0 +1,55 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from app.core.config import get_settings
+from app.core.database import get_sessionmaker
+from app.services.storage import get_s3_client
+from app.services.videos import MULTIPART_UPLOAD_CLEARED, transition_videos_status
+from app.tasks.worker import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+
+async def _expire_videos(video_ids: list[uuid.UUID]) -> None:
+    async with get_sessionmaker()() as session:
+        await transition_videos_status(
+            session,
+            video_ids,
+            "failed",
+            from_statuses=("pending",),
+            values={"error_message": "upload_expired", **MULTIPART_UPLOAD_CLEARED},
+        )
+        await session.commit()
+
+
+@celery_app.task(name="cleanup_stale_multipart_uploads")
+def cleanup_stale_multipart_uploads() -> int:
+    settings = get_settings()
+    client = get_s3_client()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.multipart_upload_expire_hours)
+
+    expired: list[uuid.UUID] = []
+    paginator = client.get_paginator("list_multipart_uploads")
+    for page in paginator.paginate(Bucket=settings.minio_bucket, Prefix="raw/"):
+        for upload in page.get("Uploads", []):
+            if upload["Initiated"] > cutoff:
+                continue
+            try:
+                client.abort_multipart_upload(
+                    Bucket=settings.minio_bucket, Key=upload["Key"], UploadId=upload["UploadId"]
+                )
+            except ClientError:
+                logger.warning("multipart_abort_failed key=%s", upload["Key"], exc_info=True)
+                continue
+            try:
+                expired.append(uuid.UUID(upload["Key"].split("/")[1]))
+            except (IndexError, ValueError):
+                continue
+
+    if expired:
+        run_async(_expire_videos(expired))
+    logger.info("multipart_cleanup aborted=%s", len(expired))
+    return len(expired)
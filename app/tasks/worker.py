@@ -1,10 +1,77 @@
+import asyncio
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 
 from app.core.config import get_settings
+from app.core.database import engine_created, get_engine
+
+TRANSCODE_SHORT_QUEUE = "transcode.short"
+TRANSCODE_LONG_QUEUE = "transcode.long"
+TRANSCODE_RETRY_QUEUE = "transcode.retry"
+
+celery_app = Celery("neo_reels", include=["app.tasks.transcode", "app.tasks.uploads"])
+celery_app.config_from_object("app.tasks.celeryconfig")
+
+T = TypeVar("T")
+
+
+def transcode_queue_for(size_bytes: int | None) -> str:
+    if size_bytes is not None and size_bytes <= get_settings().transcode_short_max_bytes:
+        return TRANSCODE_SHORT_QUEUE
+    return TRANSCODE_LONG_QUEUE
+
+# One event loop per worker process. asyncpg connections are bound to the loop that opened
+# them, so reusing the loop is what lets tasks reuse the engine's pooled connections. That
+# also means tasks must run on a single thread: use the prefork (default) or solo pool. A
+# per-thread loop would not help under --pool threads, since the engine's pool is shared.
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread_id: int | None = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread_id
+    thread_id = threading.get_ident()
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        _loop_thread_id = thread_id
+        asyncio.set_event_loop(_loop)
+    elif _loop_thread_id != thread_id:
+        raise RuntimeError("run_async needs the prefork or solo worker pool, not threads")
+    return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    return _get_loop().run_until_complete(coro)
+
+
+@worker_ready.connect
+def _start_worker_metrics(**_: Any) -> None:
+    settings = get_settings()
+    if settings.worker_metrics_port is not None:
+        from app.tasks.metrics import start_metrics_server
+
+        start_metrics_server(settings.worker_metrics_port)
+
 
-settings = get_settings()
+@worker_process_init.connect
+def _init_worker_process(**_: Any) -> None:
+    # Connections inherited through fork belong to the parent; drop them without closing.
+    if engine_created():
+        get_engine().sync_engine.dispose(close=False)
+    _get_loop()
 
-celery_app = Celery("neo_reels", broker=settings.redis_url, backend=settings.redis_url)
-celery_app.conf.update(task_default_queue="default")
 
-celery_app.autodiscover_tasks(["app.tasks"])
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**_: Any) -> None:
+    global _loop, _loop_thread_id
+    if _loop is None or _loop.is_closed():
+        return
+    if engine_created():
+        _loop.run_until_complete(get_engine().dispose())
+    _loop.close()
+    _loop = None
+    _loop_thread_id = None
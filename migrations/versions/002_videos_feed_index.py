@@ -0,0 +1,27 @@
+"""videos feed index
+
+Revision ID: 002_videos_feed_index
+Revises: 001_init
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "002_videos_feed_index"
+down_revision = "001_init"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_videos_created_at_id",
+        "videos",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_created_at_id", table_name="videos")
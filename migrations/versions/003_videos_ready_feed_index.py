@@ -0,0 +1,35 @@
+"""videos ready feed index
+
+Revision ID: 003_videos_ready_feed_index
+Revises: 002_videos_feed_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "003_videos_ready_feed_index"
+down_revision = "002_videos_feed_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_videos_ready_created_at_id",
+        "videos",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+        postgresql_where=sa.text("status = 'ready'"),
+    )
+    op.drop_index("ix_videos_created_at_id", table_name="videos")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_videos_created_at_id",
+        "videos",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    op.drop_index("ix_videos_ready_created_at_id", table_name="videos")
@@ -0,0 +1,24 @@
+"""videos hls
+
+Revision ID: 004_videos_hls
+Revises: 003_videos_ready_feed_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "004_videos_hls"
+down_revision = "003_videos_ready_feed_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("videos", sa.Column("manifest_object_key", sa.String(length=1024), nullable=True))
+    op.add_column("videos", sa.Column("renditions", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("videos", "renditions")
+    op.drop_column("videos", "manifest_object_key")
@@ -0,0 +1,26 @@
+"""videos multipart upload
+
+Revision ID: 005_videos_multipart_upload
+Revises: 004_videos_hls
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "005_videos_multipart_upload"
+down_revision = "004_videos_hls"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("videos", sa.Column("multipart_upload_id", sa.String(length=1024), nullable=True))
+    op.add_column("videos", sa.Column("multipart_part_size", sa.BigInteger(), nullable=True))
+    op.add_column("videos", sa.Column("multipart_part_count", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("videos", "multipart_part_count")
+    op.drop_column("videos", "multipart_part_size")
+    op.drop_column("videos", "multipart_upload_id")
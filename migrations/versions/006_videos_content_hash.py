@@ -0,0 +1,24 @@
+"""videos content hash
+
+Revision ID: 006_videos_content_hash
+Revises: 005_videos_multipart_upload
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "006_videos_content_hash"
+down_revision = "005_videos_multipart_upload"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("videos", sa.Column("content_hash", sa.String(length=96), nullable=True))
+    op.create_index("ix_videos_content_hash", "videos", ["content_hash"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_content_hash", table_name="videos")
+    op.drop_column("videos", "content_hash")
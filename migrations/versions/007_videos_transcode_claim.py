@@ -0,0 +1,27 @@
+"""videos transcode claim
+
+Revision ID: 007_videos_transcode_claim
+Revises: 006_videos_content_hash
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "007_videos_transcode_claim"
+down_revision = "006_videos_content_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("videos", sa.Column("transcode_claim", sa.String(length=64), nullable=True))
+    op.add_column(
+        "videos",
+        sa.Column("transcode_lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("videos", "transcode_lease_expires_at")
+    op.drop_column("videos", "transcode_claim")
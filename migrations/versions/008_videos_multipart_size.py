@@ -0,0 +1,22 @@
+"""videos multipart declared size
+
+Revision ID: 008_videos_multipart_size
+Revises: 007_videos_transcode_claim
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "008_videos_multipart_size"
+down_revision = "007_videos_transcode_claim"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("videos", sa.Column("multipart_size_bytes", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("videos", "multipart_size_bytes")
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_SNIPPET = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({'import_s': elapsed, 'modules': len(sys.modules)}))\n"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> dict:
+    # A fresh interpreter per run so nothing is already cached in sys.modules.
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_first_health(timeout: float) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_profile(top: int) -> list[tuple[int, str]]:
+    # -X importtime reports cumulative microseconds per module on stderr.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure API import time and time to the first /health response"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list, 0 to skip")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import is slower")
+    parser.add_argument("--max-ready-ms", type=float, help="fail if the median /health is slower")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    ready = [measure_first_health(args.timeout) for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_s"] for run in imports) * 1000
+    ready_ms = statistics.median(ready) * 1000
+    modules = imports[-1]["modules"]
+
+    print(f"import app.main    median {import_ms:8.1f} ms  ({modules} modules loaded)")
+    print(f"first /health      median {ready_ms:8.1f} ms  (process spawn to 200 OK)")
+    if args.top:
+        print("\nslowest imports (cumulative):")
+        for cumulative_us, name in import_profile(args.top):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"import time {import_ms:.1f} ms exceeds {args.max_import_ms} ms", file=sys.stderr)
+        failed = True
+    if args.max_ready_ms is not None and ready_ms > args.max_ready_ms:
+        print(f"/health time {ready_ms:.1f} ms exceeds {args.max_ready_ms} ms", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
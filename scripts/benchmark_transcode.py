@@ -0,0 +1,231 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.config import get_settings  # noqa: E402
+from app.tasks.transcode import _build_hls_command, _probe  # noqa: E402
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "samples", "sample.mp4")
+PSNR_RE = re.compile(r"PSNR .*average:(\S+)")
+SSIM_RE = re.compile(r"SSIM .*All:(\S+)")
+
+
+def _csv(cast):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def _testsrc(path: str, seconds: int) -> None:
+    # Near-lossless 1080p synthetic source with motion, detail and an audio track.
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size=1920x1080:rate=30:duration={seconds}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-crf",
+            "8",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            path,
+        ],
+        check=True,
+    )
+
+
+def _children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _rendition_file(hls_dir: str, height: int, output_path: str) -> None:
+    # fMP4 HLS output is an init segment followed by media fragments; concatenated they form
+    # a playable fragmented MP4 that ffmpeg can compare against the source.
+    parts = [os.path.join(hls_dir, f"init_{height}p.mp4")]
+    parts += sorted(glob.glob(os.path.join(hls_dir, f"segment_{height}p_*.m4s")))
+    with open(output_path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                out.write(f.read())
+
+
+def _quality(source_path: str, rendition_path: str, height: int) -> tuple[float, float]:
+    filters = (
+        f"[0:v]format=yuv420p,split[d0][d1];"
+        f"[1:v]scale=-2:{height}:flags=bicubic,format=yuv420p,split[r0][r1];"
+        "[d0][r0]psnr;[d1][r1]ssim"
+    )
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-nostats",
+            "-i",
+            rendition_path,
+            "-i",
+            source_path,
+            "-filter_complex",
+            filters,
+            "-an",
+            "-f",
+            "null",
+            "-",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    psnr = PSNR_RE.search(result.stderr)
+    ssim = SSIM_RE.search(result.stderr)
+    return (
+        float(psnr.group(1)) if psnr else float("nan"),
+        float(ssim.group(1)) if ssim else float("nan"),
+    )
+
+
+def run_case(
+    source_name: str,
+    source_path: str,
+    height: int,
+    preset: str,
+    crf: int,
+    threads: int,
+    audio_kbps: int,
+) -> dict:
+    settings = get_settings()
+    source_height, has_audio, duration = _probe(source_path)
+    # Heights outside the configured ladder fall back to the top rung's bitrate cap.
+    kbps = settings.transcode_ladder.get(height, max(settings.transcode_ladder.values()))
+    ladder = {height: kbps}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hls_dir = os.path.join(tmpdir, "hls")
+        os.makedirs(hls_dir)
+        args = _build_hls_command(
+            source_path,
+            hls_dir,
+            os.path.join(tmpdir, "cover.jpg"),
+            [height],
+            ladder,
+            has_audio,
+            settings.hls_segment_seconds,
+            os.path.join(tmpdir, "progress.txt"),
+            preset=preset,
+            crf=crf,
+            threads=threads,
+            audio_kbps=audio_kbps,
+        )
+        cpu_start = _children_cpu_seconds()
+        wall_start = time.perf_counter()
+        subprocess.run(args, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall = time.perf_counter() - wall_start
+        cpu = _children_cpu_seconds() - cpu_start
+
+        output_bytes = sum(
+            os.path.getsize(os.path.join(hls_dir, name)) for name in os.listdir(hls_dir)
+        )
+        rendition_path = os.path.join(tmpdir, "rendition.mp4")
+        _rendition_file(hls_dir, height, rendition_path)
+        psnr, ssim = _quality(source_path, rendition_path, height)
+
+    return {
+        "source": source_name,
+        "source_height": source_height,
+        "height": height,
+        "preset": preset,
+        "crf": crf,
+        "threads": threads,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "realtime_x": duration / wall if duration else None,
+        "output_bytes": output_bytes,
+        "kbps": output_bytes * 8 / 1000 / duration if duration else None,
+        "psnr_db": psnr,
+        "ssim": ssim,
+    }
+
+
+def print_report(rows: list[dict]) -> None:
+    header = (
+        f"{'source':<10} {'height':>6} {'preset':<10} {'crf':>4} {'thr':>4} {'wall s':>8}"
+        f" {'cpu s':>8} {'x rt':>6} {'bytes':>11} {'kbps':>7} {'psnr':>6} {'ssim':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        realtime = f"{row['realtime_x']:.2f}" if row["realtime_x"] else "n/a"
+        kbps = f"{row['kbps']:.0f}" if row["kbps"] else "n/a"
+        print(
+            f"{row['source']:<10} {row['height']:>6} {row['preset']:<10} {row['crf']:>4}"
+            f" {row['threads']:>4} {row['wall_s']:>8.2f} {row['cpu_s']:>8.2f} {realtime:>6}"
+            f" {row['output_bytes']:>11} {kbps:>7} {row['psnr_db']:>6.2f} {row['ssim']:>7.4f}"
+        )
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="CPU-only benchmark matrix for the HLS transcode command"
+    )
+    parser.add_argument("--sample-path", default=SAMPLE_PATH)
+    parser.add_argument("--sources", type=_csv(str), default=["sample", "testsrc"])
+    parser.add_argument("--testsrc-seconds", type=int, default=20)
+    parser.add_argument("--presets", type=_csv(str), default=["veryfast", "fast", "medium"])
+    parser.add_argument("--crfs", type=_csv(int), default=[23, 26])
+    parser.add_argument("--threads", type=_csv(int), default=[settings.transcode_threads])
+    parser.add_argument("--heights", type=_csv(int), default=[720])
+    parser.add_argument("--audio-kbps", type=int, default=settings.transcode_audio_bitrate_kbps)
+    parser.add_argument("--output", help="also write the rows as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sources = {}
+        if "sample" in args.sources:
+            sources["sample"] = args.sample_path
+        if "testsrc" in args.sources:
+            sources["testsrc"] = os.path.join(workdir, "testsrc.mp4")
+            _testsrc(sources["testsrc"], args.testsrc_seconds)
+
+        rows = []
+        matrix = itertools.product(
+            sources.items(), args.heights, args.presets, args.crfs, args.threads
+        )
+        for (source_name, source_path), height, preset, crf, threads in matrix:
+            print(
+                f"running {source_name} {height}p preset={preset} crf={crf} threads={threads}",
+                file=sys.stderr,
+            )
+            rows.append(
+                run_case(source_name, source_path, height, preset, crf, threads, args.audio_kbps)
+            )
+
+    print_report(rows)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+PASSWORD = os.getenv("LOADTEST_PASSWORD", "password123")
+VIDEO_PATH = os.getenv(
+    "VIDEO_PATH", os.path.join(os.path.dirname(__file__), "..", "samples", "sample.mp4")
+)
+DEFAULT_MIX = "feed=70,video=20,login=8,upload=2"
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> dict[str, dict[str, float]]:
+        report = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            report[endpoint] = {
+                "count": len(ordered),
+                "errors": self.errors[endpoint],
+                "error_rate": self.errors[endpoint] / len(ordered),
+                "rps": len(ordered) / elapsed,
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p95_ms": percentile(ordered, 95) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+            }
+        return report
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in {"feed", "video", "login", "upload"}:
+            raise argparse.ArgumentTypeError(f"unknown action: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+class VirtualUser:
+    def __init__(self, index: int, client: httpx.AsyncClient, stats: Stats, video_bytes: bytes):
+        self.email = f"loadtest-{uuid.uuid4().hex[:12]}-{index}@example.com"
+        self.client = client
+        self.stats = stats
+        self.video_bytes = video_bytes
+        self.headers: dict[str, str] = {}
+        self.cursor: str | None = None
+        self.seen_video_ids: list[str] = []
+
+    async def request(
+        self, method: str, url: str, endpoint: str | None = None, **kwargs
+    ) -> httpx.Response | None:
+        endpoint = f"{method} {endpoint or url}"
+        start = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, time.perf_counter() - start, ok=False)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - start, ok=resp.status_code < 400)
+        return resp
+
+    async def setup(self) -> bool:
+        payload = {"email": self.email, "password": PASSWORD}
+        resp = await self.request("POST", "/auth/register", json=payload)
+        if resp is None or resp.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return True
+
+    async def feed(self) -> None:
+        params = {"limit": 20}
+        if self.cursor:
+            params["cursor"] = self.cursor
+        resp = await self.request("GET", "/feed", params=params)
+        if resp is None or resp.status_code != 200:
+            return
+        body = resp.json()
+        self.seen_video_ids.extend(item["id"] for item in body["items"])
+        self.seen_video_ids = self.seen_video_ids[-200:]
+        # Scroll a few pages deep, then start again from the top like a real session would.
+        self.cursor = body.get("next_cursor") if random.random() < 0.7 else None
+
+    async def video(self) -> None:
+        if not self.seen_video_ids:
+            await self.feed()
+            return
+        video_id = random.choice(self.seen_video_ids)
+        await self.request("GET", f"/videos/{video_id}", endpoint="/videos/{id}")
+
+    async def login(self) -> None:
+        payload = {"email": self.email, "password": PASSWORD}
+        await self.request("POST", "/auth/login", json=payload)
+
+    async def upload(self) -> None:
+        init_payload = {
+            "title": "loadtest",
+            "filename": "loadtest.mp4",
+            "content_type": "video/mp4",
+            "size_bytes": len(self.video_bytes),
+        }
+        resp = await self.request(
+            "POST", "/videos/upload/init", json=init_payload, headers=self.headers
+        )
+        if resp is None or resp.status_code != 200:
+            return
+        init_resp = resp.json()
+        resp = await self.request(
+            "PUT",
+            init_resp["upload_url"],
+            endpoint="upload_url",
+            content=self.video_bytes,
+            headers={"Content-Type": "video/mp4"},
+        )
+        if resp is None or resp.status_code not in (200, 204):
+            return
+        await self.request(
+            "POST",
+            "/videos/upload/complete",
+            json={"video_id": init_resp["video_id"]},
+            headers=self.headers,
+        )
+
+    async def run(self, mix: dict[str, int], deadline: float, think_time: float) -> None:
+        actions = list(mix)
+        weights = [mix[action] for action in actions]
+        while time.monotonic() < deadline:
+            action = random.choices(actions, weights)[0]
+            await getattr(self, action)()
+            if think_time:
+                await asyncio.sleep(random.uniform(0, think_time * 2))
+
+
+async def run_load(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    video_bytes = b""
+    if args.mix.get("upload"):
+        with open(args.video_path, "rb") as f:
+            video_bytes = f.read()
+
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users)
+    client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+    async with client:
+        users = [VirtualUser(index, client, stats, video_bytes) for index in range(args.users)]
+        ready = await asyncio.gather(*(user.setup() for user in users))
+        users = [user for user, ok in zip(users, ready, strict=True) if ok]
+        if not users:
+            print("No virtual user could register; is the API running?", file=sys.stderr)
+            sys.exit(1)
+
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(user.run(args.mix, deadline, args.think_time) for user in users))
+        elapsed = time.monotonic() - start
+
+    return stats.summary(elapsed)
+
+
+def print_report(report: dict[str, dict[str, float]], baseline: dict | None) -> None:
+    header = (
+        f"{'endpoint':<30} {'count':>7} {'err%':>6} {'rps':>8}"
+        f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    if baseline:
+        header += f" {'p95 Δ':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, row in report.items():
+        line = (
+            f"{endpoint:<30} {row['count']:>7} {row['error_rate'] * 100:>5.1f}% {row['rps']:>8.1f}"
+            f" {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+        if baseline:
+            previous = baseline.get(endpoint)
+            delta = f"{row['p95_ms'] - previous['p95_ms']:+.1f}" if previous else "n/a"
+            line += f" {delta:>8}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent HTTP load test for the reels API")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--users", type=int, default=20, help="number of virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between actions")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--video-path", default=VIDEO_PATH)
+    parser.add_argument("--output", help="write the report as JSON, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="JSON report from a previous run to compare p95 against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = asyncio.run(run_load(args))
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()